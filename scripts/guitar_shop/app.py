@@ -1,8 +1,30 @@
 import streamlit as st
 import requests
+import orjson
+import pandas as pd
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from urllib.parse import quote_plus
 from typing import Optional
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 API_BASE_URL = "http://localhost:8000/api"
+CATALOG_PAGE_SIZE = 24
+ETAG_STORE_SIZE = 256
+HTTP_METHODS = ("GET", "POST", "PUT", "DELETE")
+API_TIMEOUT = (2, 10)
+ADMIN_PAGE_SIZE = 50
+GUITAR_TYPES = ("electric", "acoustic", "bass", "classical")
+CART_GUITAR_FIELDS = ("id", "brand", "name", "guitar_type", "price", "stock", "discount_percent", "image_url")
+CATEGORY_IMAGES = {
+    "Electric": "https://placeholder.svg?height=200&width=300&query=electric+guitar+collection",
+    "Acoustic": "https://placeholder.svg?height=200&width=300&query=acoustic+guitar+collection",
+    "Bass": "https://placeholder.svg?height=200&width=300&query=bass+guitar+collection",
+    "Classical": "https://placeholder.svg?height=200&width=300&query=classical+guitar+collection"
+}
+DEFAULT_CATEGORY_IMAGE = "https://placeholder.svg?height=200&width=300&query=guitar"
 
 st.set_page_config(
     page_title="StringMaster Guitar Shop",
@@ -11,7 +33,7 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-st.markdown("""
+PAGE_CSS = """
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -64,7 +86,7 @@ st.markdown("""
     #MainMenu {visibility: hidden;}
     footer {visibility: hidden;}
 </style>
-""", unsafe_allow_html=True)
+"""
 
 if "token" not in st.session_state:
     st.session_state.token = None
@@ -74,41 +96,147 @@ if "page" not in st.session_state:
     st.session_state.page = "login"
 if "cart" not in st.session_state:
     st.session_state.cart = {}
+if "cart_version" not in st.session_state:
+    st.session_state.cart_version = 0
 if "selected_category" not in st.session_state:
     st.session_state.selected_category = None
 
 
-def api_request(method: str, endpoint: str, data: dict = None, auth: bool = False) -> Optional[dict]:
-    url = f"{API_BASE_URL}{endpoint}"
+class APIError(Exception):
+    pass
+
+
+@st.cache_resource
+def get_http_session() -> requests.Session:
+    session = requests.Session()
+    session.headers.update({"Accept": "application/json"})
+    retries = Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504], raise_on_status=False)
+    session.mount("http://", HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retries))
+    return session
+
+
+@st.cache_resource
+def _etag_store() -> dict:
+    return {}
+
+
+def _send(method: str, endpoint: str, data: dict = None, token: Optional[str] = None):
+    if method not in HTTP_METHODS:
+        return None
+    
     headers = {}
+    kwargs = {"headers": headers}
+    
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    
+    if method == "GET":
+        kwargs["params"] = data
+        etag_key = (endpoint, tuple(sorted((data or {}).items())), token)
+        stored = _etag_store().get(etag_key)
+        if stored:
+            headers["If-None-Match"] = stored[0]
+    elif method != "DELETE":
+        headers["Content-Type"] = "application/json"
+        kwargs["data"] = orjson.dumps(data) if data is not None else None
+    
+    response = get_http_session().request(method, API_BASE_URL + endpoint, timeout=API_TIMEOUT, **kwargs)
     
-    if auth and st.session_state.token:
-        headers["Authorization"] = f"Bearer {st.session_state.token}"
+    if response.status_code == 304 and method == "GET" and stored:
+        return stored[1]
+    
+    if response.status_code in [200, 201]:
+        result = orjson.loads(response.content)
+        if method == "GET" and "ETag" in response.headers:
+            store = _etag_store()
+            if len(store) >= ETAG_STORE_SIZE:
+                store.clear()
+            store[etag_key] = (response.headers["ETag"], result)
+        return result
     
     try:
-        if method == "GET":
-            response = requests.get(url, headers=headers, params=data)
-        elif method == "POST":
-            response = requests.post(url, headers=headers, json=data)
-        elif method == "PUT":
-            response = requests.put(url, headers=headers, json=data)
-        elif method == "DELETE":
-            response = requests.delete(url, headers=headers)
-        else:
-            return None
-        
-        if response.status_code in [200, 201]:
-            return response.json()
+        detail = orjson.loads(response.content).get("detail", "Unknown error")
+    except orjson.JSONDecodeError:
+        detail = f"{response.status_code} {response.reason}"
+    raise APIError(detail)
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_get(endpoint: str, params: tuple = (), token: Optional[str] = None):
+    return _send("GET", endpoint, dict(params), token)
+
+
+def clear_api_cache():
+    _cached_get.clear()
+
+
+def clear_cached_get(endpoint: str, data: dict = None, auth: bool = False):
+    token = st.session_state.token if auth else None
+    _cached_get.clear(endpoint, tuple(sorted((data or {}).items())), token)
+
+
+# Fragment reruns skip main(), so fragments call this too.
+def reset_run_requests():
+    st.session_state.run_requests = {}
+
+
+def api_request(method: str, endpoint: str, data: dict = None, auth: bool = False, cached: bool = False) -> Optional[dict]:
+    token = st.session_state.token if auth else None
+    
+    run_requests = st.session_state.setdefault("run_requests", {})
+    if method == "GET":
+        params = tuple(sorted((data or {}).items()))
+        request_key = (endpoint, params, token)
+        if request_key in run_requests:
+            return run_requests[request_key]
+    else:
+        run_requests.clear()
+    
+    try:
+        if cached and method == "GET":
+            result = _cached_get(endpoint, params, token)
         else:
-            error = response.json().get("detail", "Unknown error")
-            st.error(f"Error: {error}")
-            return None
+            result = _send(method, endpoint, data, token)
+    except APIError as e:
+        st.error(f"Error: {e}")
+        return None
     except requests.exceptions.ConnectionError:
         st.error("Cannot connect to API. Please ensure FastAPI server is running on port 8000.")
         return None
+    except requests.exceptions.Timeout:
+        st.error("The API took too long to respond. Please try again.")
+        return None
     except Exception as e:
         st.error(f"Request failed: {str(e)}")
         return None
+    
+    if method == "GET" and result is not None:
+        run_requests[request_key] = result
+    return result
+
+
+def run_parallel(fn, items: list, max_workers: int = 8) -> list:
+    if not items:
+        return []
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(
+        max_workers=min(max_workers, len(items)),
+        initializer=add_script_run_ctx,
+        initargs=(None, ctx)
+    ) as executor:
+        return list(executor.map(fn, items))
+
+
+def api_get_many(*calls: tuple) -> list:
+    return run_parallel(lambda call: api_request("GET", *call), list(calls))
+
+
+def fetch_categories():
+    return api_request("GET", "/categories/counts", cached=True)
+
+
+def fetch_guitars(params: dict):
+    return api_request("GET", "/guitars/page", params, cached=True)
 
 
 def logout():
@@ -116,14 +244,35 @@ def logout():
     st.session_state.token = None
     st.session_state.user = None
     st.session_state.cart = {}
+    cart_changed()
     st.session_state.page = "login"
     st.session_state.selected_category = None
 
 
+@lru_cache(maxsize=256)
+def placeholder_url(*terms: str, width: int = 300, height: int = 200) -> str:
+    return f"https://placeholder.svg?height={height}&width={width}&query={quote_plus(' '.join(terms))}"
+
+
+# Every cart mutation must call this.
+def cart_changed():
+    st.session_state.cart_version += 1
+
+
 def get_cart_summary():
-    cart = st.session_state.cart
-    total_items = sum(item["quantity"] for item in cart.values())
-    total_price = sum(item.get("effective_price", item["guitar"]["price"]) * item["quantity"] for item in cart.values())
+    version = st.session_state.cart_version
+    cached = st.session_state.get("cart_summary_cache")
+    if cached and cached[0] == version:
+        return cached[1]
+    
+    total_items = 0
+    total_price = 0
+    for item in st.session_state.cart.values():
+        quantity = item["quantity"]
+        total_items += quantity
+        total_price += item.get("effective_price", item["guitar"]["price"]) * quantity
+    
+    st.session_state.cart_summary_cache = (version, (total_items, total_price))
     return total_items, total_price
 
 
@@ -208,6 +357,95 @@ def show_login_page():
             st.caption("Password requirements: 6+ characters, uppercase, lowercase, and digit")
 
 
+def _sidebar_cart_summary():
+    total_items, total_price = get_cart_summary()
+    if total_items > 0:
+        st.subheader("Cart Summary")
+        st.metric("Items", total_items)
+        st.metric("Total", f"${total_price:,.2f}")
+        if st.button("View Cart", type="primary", use_container_width=True):
+            st.session_state.page = "cart"
+            st.rerun()
+
+
+def _add_to_cart(guitar: dict, effective_price: float):
+    guitar_id = str(guitar['id'])
+    cart = st.session_state.cart
+    if guitar_id in cart:
+        if cart[guitar_id]["quantity"] < guitar['stock']:
+            cart[guitar_id]["quantity"] += 1
+            cart_changed()
+            st.toast(f"Added another {guitar['name']}!")
+        else:
+            st.toast("Maximum stock reached")
+    else:
+        cart[guitar_id] = {
+            "guitar": {k: guitar[k] for k in CART_GUITAR_FIELDS if k in guitar},
+            "quantity": 1,
+            "effective_price": effective_price
+        }
+        cart_changed()
+        st.toast(f"Added {guitar['brand']} {guitar['name']} to cart!")
+
+
+def _card_display(guitar: dict) -> dict:
+    discount = guitar.get('discount_percent', 0)
+    if discount > 0:
+        original_price = guitar.get('original_price', guitar['price'])
+        effective_price = guitar.get('discounted_price', guitar['price'] * (1 - discount / 100))
+        price_html = [
+            f"<p class='original-price'>${original_price:,.2f}</p>",
+            f"<p class='discount-price'>${effective_price:,.2f} ({discount:.0f}% OFF)</p>"
+        ]
+    else:
+        effective_price = guitar['price']
+        price_html = [f"<p class='price-tag'>${effective_price:,.2f}</p>"]
+    
+    return {
+        "image": guitar.get("image_url") or placeholder_url(guitar['brand'], guitar['guitar_type'], "guitar"),
+        "title": f"### {guitar['brand']} {guitar['name']}",
+        "type_label": f"Type: {guitar['guitar_type'].capitalize()}",
+        "description": f"_{guitar.get('description', '')}_",
+        "price_html": price_html,
+        "effective_price": effective_price
+    }
+
+
+def _render_guitar_card(guitar: dict, display: dict):
+    with st.container():
+        st.image(display["image"], use_container_width=True)
+        
+        st.markdown(display["title"])
+        st.caption(display["type_label"])
+        st.markdown(display["description"])
+        
+        for price_html in display["price_html"]:
+            st.markdown(price_html, unsafe_allow_html=True)
+        effective_price = display["effective_price"]
+        
+        stock = guitar['stock']
+        if stock > 10:
+            st.success(f"In Stock: {stock} available")
+        elif stock > 0:
+            st.warning(f"Low Stock: {stock} left")
+        else:
+            st.error("Out of Stock")
+        
+        if not is_admin():
+            if stock > 0:
+                st.button(
+                    "Add to Cart",
+                    key=f"add_{guitar['id']}",
+                    on_click=_add_to_cart,
+                    args=(guitar, effective_price),
+                    use_container_width=True
+                )
+            else:
+                st.button("Out of Stock", key=f"oos_{guitar['id']}", disabled=True, use_container_width=True)
+        
+        st.markdown("---")
+
+
 def show_catalog():
     st.markdown("<h1 class='main-header'>Guitar Catalog</h1>", unsafe_allow_html=True)
     
@@ -218,43 +456,42 @@ def show_catalog():
     with st.sidebar:
         st.header("Filters")
         
-        price_range = st.slider(
-            "Price Range ($)",
-            min_value=0,
-            max_value=5000,
-            value=(0, 5000),
-            step=100
-        )
-        
-        categories = api_request("GET", "/categories")
+        categories = fetch_categories()
         type_options = ["All Types"]
         if categories:
             type_options += [cat["name"] for cat in categories]
         
-        selected_type = st.selectbox(
-            "Guitar Type", 
-            type_options,
-            index=type_options.index(st.session_state.selected_category) if st.session_state.selected_category in type_options else 0
-        )
+        with st.form("catalog_filters"):
+            price_range = st.slider(
+                "Price Range ($)",
+                min_value=0,
+                max_value=5000,
+                value=st.session_state.get("catalog_price_range", (0, 5000)),
+                step=100
+            )
+            
+            selected_type = st.selectbox(
+                "Guitar Type", 
+                type_options,
+                index=type_options.index(st.session_state.selected_category) if st.session_state.selected_category in type_options else 0
+            )
+            
+            in_stock_only = st.checkbox("In Stock Only", value=st.session_state.get("catalog_in_stock", True))
+            
+            st.form_submit_button("Apply Filters", use_container_width=True)
+        
+        st.session_state.catalog_price_range = price_range
+        st.session_state.catalog_in_stock = in_stock_only
         
         if st.session_state.selected_category:
             if st.button("Clear Category Filter"):
                 st.session_state.selected_category = None
                 st.rerun()
         
-        in_stock_only = st.checkbox("In Stock Only", value=True)
-        
         st.markdown("---")
         
         if not is_admin():
-            total_items, total_price = get_cart_summary()
-            if total_items > 0:
-                st.subheader("Cart Summary")
-                st.metric("Items", total_items)
-                st.metric("Total", f"${total_price:,.2f}")
-                if st.button("View Cart", type="primary", use_container_width=True):
-                    st.session_state.page = "cart"
-                    st.rerun()
+            _sidebar_cart_summary()
     
     params = {
         "min_price": price_range[0],
@@ -268,77 +505,53 @@ def show_catalog():
     else:
         st.session_state.selected_category = None
     
-    guitars = api_request("GET", "/guitars", params)
+    if st.session_state.get("catalog_params") != params:
+        st.session_state.catalog_params = dict(params)
+        st.session_state.catalog_offset = 0
+    
+    offset = st.session_state.get("catalog_offset", 0)
+    page = fetch_guitars({**params, "limit": CATALOG_PAGE_SIZE, "offset": offset})
     
-    if guitars is None:
+    if page is None:
         st.warning("Unable to load guitars. Please check if the API is running.")
         return
     
+    guitars = page["items"]
+    total = page["total"]
+    
     if selected_type != "All Types":
         st.info(f"Showing {selected_type} guitars only")
     
-    st.subheader(f"Showing {len(guitars)} guitars")
+    if not guitars and offset > 0 and total > 0:
+        st.session_state.catalog_offset = (total - 1) // CATALOG_PAGE_SIZE * CATALOG_PAGE_SIZE
+        st.rerun()
     
     if not guitars:
+        st.subheader("Showing 0 guitars")
         st.info("No guitars match your filters. Try adjusting the criteria.")
         return
     
+    st.subheader(f"Showing {offset + 1}-{offset + len(guitars)} of {total} guitars")
+    
+    cards = [(guitar, _card_display(guitar)) for guitar in guitars]
+    
     cols = st.columns(3)
     
-    for idx, guitar in enumerate(guitars):
+    for idx, (guitar, display) in enumerate(cards):
         with cols[idx % 3]:
-            with st.container():
-                st.image(
-                    guitar.get("image_url") or f"https://placeholder.svg?height=200&width=300&query={guitar['brand']}+{guitar['guitar_type']}+guitar",
-                    use_container_width=True
-                )
-                
-                st.markdown(f"### {guitar['brand']} {guitar['name']}")
-                st.caption(f"Type: {guitar['guitar_type'].capitalize()}")
-                st.markdown(f"_{guitar.get('description', '')}_")
-                
-                discount = guitar.get('discount_percent', 0)
-                if discount > 0:
-                    original_price = guitar.get('original_price', guitar['price'])
-                    discounted_price = guitar.get('discounted_price', guitar['price'] * (1 - discount / 100))
-                    st.markdown(f"<p class='original-price'>${original_price:,.2f}</p>", unsafe_allow_html=True)
-                    st.markdown(f"<p class='discount-price'>${discounted_price:,.2f} ({discount:.0f}% OFF)</p>", unsafe_allow_html=True)
-                    effective_price = discounted_price
-                else:
-                    st.markdown(f"<p class='price-tag'>${guitar['price']:,.2f}</p>", unsafe_allow_html=True)
-                    effective_price = guitar['price']
-                
-                stock = guitar['stock']
-                if stock > 10:
-                    st.success(f"In Stock: {stock} available")
-                elif stock > 0:
-                    st.warning(f"Low Stock: {stock} left")
-                else:
-                    st.error("Out of Stock")
-                
-                if not is_admin():
-                    if stock > 0:
-                        if st.button(f"Add to Cart", key=f"add_{guitar['id']}", use_container_width=True):
-                            guitar_id = str(guitar['id'])
-                            if guitar_id in st.session_state.cart:
-                                current_qty = st.session_state.cart[guitar_id]["quantity"]
-                                if current_qty < stock:
-                                    st.session_state.cart[guitar_id]["quantity"] += 1
-                                    st.success(f"Added another {guitar['name']}!")
-                                else:
-                                    st.warning("Maximum stock reached")
-                            else:
-                                st.session_state.cart[guitar_id] = {
-                                    "guitar": guitar,
-                                    "quantity": 1,
-                                    "effective_price": effective_price
-                                }
-                                st.success(f"Added {guitar['brand']} {guitar['name']} to cart!")
-                            st.rerun()
-                    else:
-                        st.button("Out of Stock", key=f"oos_{guitar['id']}", disabled=True, use_container_width=True)
-                
-                st.markdown("---")
+            _render_guitar_card(guitar, display)
+    
+    col_prev, col_page, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        if st.button("Previous", disabled=offset == 0, use_container_width=True):
+            st.session_state.catalog_offset = max(offset - CATALOG_PAGE_SIZE, 0)
+            st.rerun()
+    with col_page:
+        st.caption(f"Page {offset // CATALOG_PAGE_SIZE + 1} of {(total - 1) // CATALOG_PAGE_SIZE + 1}")
+    with col_next:
+        if st.button("Next", disabled=offset + CATALOG_PAGE_SIZE >= total, use_container_width=True):
+            st.session_state.catalog_offset = offset + CATALOG_PAGE_SIZE
+            st.rerun()
 
 
 def show_cart():
@@ -360,7 +573,9 @@ def show_cart():
             st.rerun()
         return
     
-    for guitar_id, item in list(cart.items()):
+    to_remove = []
+    
+    for guitar_id, item in cart.items():
         guitar = item["guitar"]
         quantity = item["quantity"]
         effective_price = item.get("effective_price", guitar["price"])
@@ -369,7 +584,7 @@ def show_cart():
         
         with col1:
             st.image(
-                guitar.get("image_url") or f"https://placeholder.svg?height=80&width=80&query={guitar['brand']}+guitar",
+                guitar.get("image_url") or placeholder_url(guitar['brand'], "guitar", width=80, height=80),
                 width=80
             )
         
@@ -393,15 +608,21 @@ def show_cart():
             )
             if new_qty != quantity:
                 st.session_state.cart[guitar_id]["quantity"] = new_qty
+                cart_changed()
                 st.rerun()
         
         with col5:
             if st.button("Remove", key=f"remove_{guitar_id}"):
-                del st.session_state.cart[guitar_id]
-                st.rerun()
+                to_remove.append(guitar_id)
         
         st.markdown("---")
     
+    if to_remove:
+        for guitar_id in to_remove:
+            del cart[guitar_id]
+        cart_changed()
+        st.rerun()
+    
     st.markdown("### Order Summary")
     
     total_items, total_price = get_cart_summary()
@@ -421,16 +642,20 @@ def show_cart():
         st.markdown(f"## ${total_price:,.2f}")
         
         if st.button("Checkout / Purchase", type="primary", use_container_width=True):
-            for guitar_id, item in cart.items():
-                api_request("POST", "/guitars/cart/add", {
-                    "guitar_id": int(guitar_id),
-                    "quantity": item["quantity"]
-                }, auth=True)
+            added = api_request("POST", "/guitars/cart/bulk-add", {
+                "items": [
+                    {"guitar_id": int(guitar_id), "quantity": item["quantity"]}
+                    for guitar_id, item in cart.items()
+                ],
+                "replace": True
+            }, auth=True)
             
-            result = api_request("POST", "/guitars/purchase", auth=True)
+            result = api_request("POST", "/guitars/purchase", auth=True) if added else None
             
             if result:
+                clear_api_cache()
                 st.session_state.cart = {}
+                cart_changed()
                 st.success(f"Order #{result.get('order_id')} placed successfully! Total: ${result.get('total', 0):,.2f}")
                 st.balloons()
         
@@ -442,7 +667,7 @@ def show_cart():
 def show_categories():
     st.markdown("<h1 class='main-header'>Guitar Categories</h1>", unsafe_allow_html=True)
     
-    categories = api_request("GET", "/categories")
+    categories = fetch_categories()
     
     if not categories:
         st.warning("Unable to load categories.")
@@ -450,26 +675,17 @@ def show_categories():
     
     cols = st.columns(2)
     
-    category_images = {
-        "Electric": "https://placeholder.svg?height=200&width=300&query=electric+guitar+collection",
-        "Acoustic": "https://placeholder.svg?height=200&width=300&query=acoustic+guitar+collection",
-        "Bass": "https://placeholder.svg?height=200&width=300&query=bass+guitar+collection",
-        "Classical": "https://placeholder.svg?height=200&width=300&query=classical+guitar+collection"
-    }
-    
     for idx, category in enumerate(categories):
         with cols[idx % 2]:
             with st.container():
                 st.image(
-                    category_images.get(category["name"], "https://placeholder.svg?height=200&width=300&query=guitar"),
+                    CATEGORY_IMAGES.get(category["name"], DEFAULT_CATEGORY_IMAGE),
                     use_container_width=True
                 )
                 st.markdown(f"### {category['name']} Guitars")
                 st.markdown(f"_{category.get('description', '')}_")
                 
-                cat_guitars = api_request("GET", f"/categories/{category['id']}/guitars")
-                if cat_guitars:
-                    st.caption(f"{cat_guitars.get('count', 0)} guitars available")
+                st.caption(f"{category.get('guitar_count', 0)} guitars available")
                 
                 if st.button(f"Browse {category['name']}", key=f"cat_{category['id']}", use_container_width=True):
                     st.session_state.selected_category = category['name']
@@ -508,7 +724,7 @@ def show_profile():
     if not is_admin():
         st.subheader("Order History")
         
-        orders = api_request("GET", "/guitars/orders/history", auth=True)
+        orders = api_request("GET", "/guitars/orders/history", auth=True, cached=True)
         
         if orders and orders.get("orders"):
             for order in orders["orders"]:
@@ -527,6 +743,82 @@ def show_profile():
         st.rerun()
 
 
+def _load_admin_pages(endpoint: str, key: str, pages: int) -> tuple:
+    rows, queries, seen = [], [], set()
+    before_id = None
+    for _ in range(pages):
+        page_query = {"limit": ADMIN_PAGE_SIZE}
+        if before_id is not None:
+            page_query["before_id"] = before_id
+        queries.append(page_query)
+        page = api_request("GET", endpoint, page_query, auth=True, cached=True)
+        batch = page.get(key, []) if page else []
+        rows += [row for row in batch if row["id"] not in seen]
+        seen.update(row["id"] for row in batch)
+        if len(batch) < ADMIN_PAGE_SIZE:
+            break
+        before_id = batch[-1]["id"]
+    return rows, queries
+
+
+UNREAD_NOTIFICATIONS_QUERY = {"unread_only": True}
+
+
+def _mark_notifications_read(payload: dict, queries: list):
+    if api_request("POST", "/admin/notifications/mark-read", payload, auth=True):
+        for query in queries + [UNREAD_NOTIFICATIONS_QUERY]:
+            clear_cached_get("/admin/notifications", query, auth=True)
+        clear_cached_get("/admin/notifications/unread-count", auth=True)
+
+
+def _load_more_notifications(pages: int):
+    st.session_state.admin_notif_pages = pages + 1
+
+
+@st.fragment
+def _admin_notifications():
+    reset_run_requests()
+    st.subheader("Purchase Notifications")
+    
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        show_unread_only = st.checkbox("Show unread only", value=False)
+    
+    if show_unread_only:
+        queries = [UNREAD_NOTIFICATIONS_QUERY]
+        page = api_request("GET", "/admin/notifications", UNREAD_NOTIFICATIONS_QUERY, auth=True, cached=True)
+        notifications = page.get("notifications", []) if page else []
+    else:
+        pages = st.session_state.get("admin_notif_pages", 1)
+        notifications, queries = _load_admin_pages("/admin/notifications", "notifications", pages)
+    
+    with col2:
+        st.button("Mark All Read", on_click=_mark_notifications_read, args=({"mark_all": True}, queries))
+    
+    if notifications:
+        for notif in notifications:
+            is_unread = not notif.get("is_read", True)
+            
+            with st.expander(f"{'[NEW] ' if is_unread else ''}Order #{notif['order_id']} - {notif['username']} - ${notif['total']:,.2f}"):
+                st.markdown(f"**Customer:** {notif['username']}")
+                st.markdown(f"**Total:** ${notif['total']:,.2f}")
+                st.markdown(f"**Date:** {notif['created_at']}")
+                st.markdown(f"**Status:** {notif.get('order_status', 'pending').upper()}")
+                
+                if is_unread:
+                    st.button(
+                        "Mark as Read",
+                        key=f"read_{notif['id']}",
+                        on_click=_mark_notifications_read,
+                        args=({"notification_id": notif['id']}, queries)
+                    )
+        
+        if not show_unread_only and len(notifications) == pages * ADMIN_PAGE_SIZE:
+            st.button("Load more notifications", on_click=_load_more_notifications, args=(pages,))
+    else:
+        st.info("No notifications to display.")
+
+
 def show_admin_dashboard():
     st.markdown("<h1 class='main-header'>Admin Dashboard</h1>", unsafe_allow_html=True)
     
@@ -534,16 +826,26 @@ def show_admin_dashboard():
         st.error("Access denied. Admin privileges required.")
         return
     
-    tab_overview, tab_users, tab_inventory, tab_orders, tab_discounts, tab_add_guitar = st.tabs([
-        "Overview", "Online Users", "Inventory & Stats", "Orders & Notifications", "Discounts", "Add Guitar"
-    ])
+    section = st.radio(
+        "Section",
+        ["Overview", "Online Users", "Inventory & Stats", "Orders & Notifications", "Discounts", "Add Guitar"],
+        horizontal=True,
+        key="admin_tab",
+        label_visibility="collapsed"
+    )
     
-    with tab_overview:
+    if section == "Overview":
         st.subheader("Shop Overview")
         
-        stats = api_request("GET", "/stats")
+        stats, unread = api_get_many(
+            ("/stats", None, False, True),
+            ("/admin/notifications/unread-count", None, True, True)
+        )
         
         if stats:
+            by_type = stats.get("by_type") or {}
+            by_brand = stats.get("by_brand") or {}
+            
             col1, col2, col3, col4 = st.columns(4)
             col1.metric("Total Products", stats.get("total_products", 0))
             col2.metric("Total Units", stats.get("total_units", 0))
@@ -552,21 +854,23 @@ def show_admin_dashboard():
             
             col1, col2, col3, col4 = st.columns(4)
             col1.metric("Total Orders", stats.get("total_orders", 0))
-            col2.metric("Categories", len(stats.get("by_type", {})))
-            col3.metric("Brands", len(stats.get("by_brand", {})))
+            col2.metric("Categories", len(by_type))
+            col3.metric("Brands", len(by_brand))
             col4.metric("Active Discounts", stats.get("discounted_count", 0))
         
-        notifications = api_request("GET", "/admin/notifications", {"unread_only": True}, auth=True)
-        if notifications and notifications.get("count", 0) > 0:
-            st.warning(f"You have {notifications['count']} unread purchase notifications!")
+        if unread and unread.get("count", 0) > 0:
+            st.warning(f"You have {unread['count']} unread purchase notifications!")
     
-    with tab_users:
+    elif section == "Online Users":
         st.subheader("Currently Online Users")
         
         if st.button("Refresh Online Users", key="refresh_users"):
             st.rerun()
         
-        online_data = api_request("GET", "/admin/online-users", auth=True)
+        online_data, all_users = api_get_many(
+            ("/admin/online-users", None, True, False),
+            ("/users", None, True, True)
+        )
         
         if online_data:
             st.metric("Online Customers", online_data.get("online_count", 0))
@@ -588,17 +892,21 @@ def show_admin_dashboard():
         st.markdown("---")
         st.subheader("All Users")
         
-        all_users = api_request("GET", "/users", auth=True)
         if all_users:
             for user in all_users:
                 if user['role'] != 'admin':
                     st.markdown(f"- **{user['username']}** ({user['email']}) - {user['role']}")
     
-    with tab_inventory:
+    elif section == "Inventory & Stats":
         st.subheader("Inventory Statistics")
         
-        brand_stats = api_request("GET", "/admin/brand-statistics", auth=True)
-        type_stats = api_request("GET", "/admin/type-statistics", auth=True)
+        brand_stats, type_stats, low_stock = api_get_many(
+            ("/admin/brand-statistics", None, True, True),
+            ("/admin/type-statistics", None, True, True),
+            ("/admin/low-stock", None, True, True)
+        )
+        
+        progress_scale = 1 / 10
         
         col1, col2 = st.columns(2)
         
@@ -607,7 +915,7 @@ def show_admin_dashboard():
             if brand_stats and brand_stats.get("brands"):
                 for brand in brand_stats["brands"]:
                     st.markdown(f"**{brand['brand']}**")
-                    st.progress(min(brand['model_count'] / 10, 1.0))
+                    st.progress(min(brand['model_count'] * progress_scale, 1.0))
                     st.caption(f"{brand['model_count']} models | {brand['total_stock']} units | Avg: ${brand['avg_price']:,.0f}")
         
         with col2:
@@ -615,74 +923,59 @@ def show_admin_dashboard():
             if type_stats and type_stats.get("types"):
                 for gtype in type_stats["types"]:
                     st.markdown(f"**{gtype['guitar_type'].capitalize()}**")
-                    st.progress(min(gtype['model_count'] / 10, 1.0))
+                    st.progress(min(gtype['model_count'] * progress_scale, 1.0))
                     st.caption(f"{gtype['model_count']} models | {gtype['total_stock']} units | Value: ${gtype['inventory_value']:,.0f}")
         
         st.markdown("---")
         st.subheader("Brand Statistics Chart")
         
         if brand_stats and brand_stats.get("brands"):
-            import pandas as pd
+            df = pd.DataFrame(brand_stats["brands"]).set_index('brand')
             
-            df = pd.DataFrame(brand_stats["brands"])
-            
-            st.bar_chart(df.set_index('brand')['model_count'])
+            st.bar_chart(df['model_count'])
             
             st.markdown("#### Stock by Brand")
-            st.bar_chart(df.set_index('brand')['total_stock'])
+            st.bar_chart(df['total_stock'])
             
             st.markdown("#### Inventory Value by Brand")
-            st.bar_chart(df.set_index('brand')['inventory_value'])
-    
-    with tab_orders:
-        st.subheader("Purchase Notifications")
-        
-        col1, col2 = st.columns([3, 1])
-        with col1:
-            show_unread_only = st.checkbox("Show unread only", value=False)
-        with col2:
-            if st.button("Mark All Read"):
-                result = api_request("POST", "/admin/notifications/mark-read", {"mark_all": True}, auth=True)
-                if result:
-                    st.success(result.get("message", "Done"))
-                    st.rerun()
+            st.bar_chart(df['inventory_value'])
         
-        notifications = api_request("GET", "/admin/notifications", {"unread_only": show_unread_only}, auth=True)
+        st.markdown("---")
+        st.subheader("Low Stock")
         
-        if notifications and notifications.get("notifications"):
-            for notif in notifications["notifications"]:
-                is_unread = not notif.get("is_read", True)
-                
-                with st.expander(f"{'[NEW] ' if is_unread else ''}Order #{notif['order_id']} - {notif['username']} - ${notif['total']:,.2f}"):
-                    st.markdown(f"**Customer:** {notif['username']}")
-                    st.markdown(f"**Total:** ${notif['total']:,.2f}")
-                    st.markdown(f"**Date:** {notif['created_at']}")
-                    st.markdown(f"**Status:** {notif.get('order_status', 'pending').upper()}")
-                    
-                    if is_unread:
-                        if st.button("Mark as Read", key=f"read_{notif['id']}"):
-                            api_request("POST", "/admin/notifications/mark-read", {"notification_id": notif['id']}, auth=True)
-                            st.rerun()
+        if low_stock and low_stock.get("guitars"):
+            for guitar in low_stock["guitars"]:
+                label = "Out of stock" if guitar['stock'] == 0 else f"{guitar['stock']} left"
+                st.markdown(f"- **{guitar['brand']} {guitar['name']}** - {label}")
         else:
-            st.info("No notifications to display.")
+            st.info("All guitars are well stocked.")
+    
+    elif section == "Orders & Notifications":
+        _admin_notifications()
+        
+        order_pages = st.session_state.get("admin_order_pages", 1)
+        orders, _ = _load_admin_pages("/admin/orders", "orders", order_pages)
         
         st.markdown("---")
         st.subheader("All Orders")
         
-        orders = api_request("GET", "/admin/orders", auth=True)
-        
-        if orders and orders.get("orders"):
-            for order in orders["orders"]:
+        if orders:
+            for order in orders:
                 with st.expander(f"Order #{order['id']} - {order['username']} - ${order['total']:,.2f} ({order['status'].upper()})"):
                     st.markdown(f"**Customer:** {order['username']}")
                     st.markdown(f"**Date:** {order['created_at']}")
                     st.markdown("**Items:**")
                     for item in order['items']:
                         st.markdown(f"- {item['guitar_name']} x{item['quantity']} @ ${item['price']:,.2f}")
+            
+            if len(orders) == order_pages * ADMIN_PAGE_SIZE:
+                if st.button("Load more orders"):
+                    st.session_state.admin_order_pages = order_pages + 1
+                    st.rerun()
         else:
             st.info("No orders yet.")
     
-    with tab_discounts:
+    elif section == "Discounts":
         st.subheader("Discount Management")
         
         col1, col2 = st.columns(2)
@@ -693,13 +986,13 @@ def show_admin_dashboard():
             discount_type = st.selectbox("Discount Target", ["Brand", "Type", "Specific Guitar"])
             
             if discount_type == "Brand":
-                brand_stats = api_request("GET", "/admin/brand-statistics", auth=True)
+                brand_stats = api_request("GET", "/admin/brand-statistics", auth=True, cached=True)
                 if brand_stats and brand_stats.get("brands"):
                     brands = [b['brand'] for b in brand_stats["brands"]]
                     selected_target = st.selectbox("Select Brand", brands)
                     target_type = "brand"
             elif discount_type == "Type":
-                selected_target = st.selectbox("Select Type", ["electric", "acoustic", "bass", "classical"])
+                selected_target = st.selectbox("Select Type", GUITAR_TYPES)
                 target_type = "type"
             else:
                 guitar_id = st.number_input("Guitar ID", min_value=1, step=1)
@@ -715,13 +1008,14 @@ def show_admin_dashboard():
                     "target_value": selected_target
                 }, auth=True)
                 if result:
+                    clear_api_cache()
                     st.success(result.get("message", "Discount applied!"))
                     st.rerun()
         
         with col2:
             st.markdown("#### Active Discounts")
             
-            discounted = api_request("GET", "/admin/discounted-guitars", auth=True)
+            discounted = api_request("GET", "/admin/discounted-guitars", auth=True, cached=True)
             
             if discounted and discounted.get("guitars"):
                 st.metric("Guitars with Discounts", discounted.get("count", 0))
@@ -737,10 +1031,11 @@ def show_admin_dashboard():
             if st.button("Clear All Discounts", type="secondary"):
                 result = api_request("POST", "/admin/discounts/clear", auth=True)
                 if result:
+                    clear_api_cache()
                     st.success(result.get("message", "Discounts cleared!"))
                     st.rerun()
     
-    with tab_add_guitar:
+    elif section == "Add Guitar":
         st.subheader("Add New Guitar to Inventory")
         
         with st.form("add_guitar_form"):
@@ -749,7 +1044,7 @@ def show_admin_dashboard():
             with col1:
                 name = st.text_input("Guitar Name", placeholder="e.g., Player Stratocaster")
                 brand = st.text_input("Brand", placeholder="e.g., Fender")
-                guitar_type = st.selectbox("Guitar Type", ["electric", "acoustic", "bass", "classical"])
+                guitar_type = st.selectbox("Guitar Type", GUITAR_TYPES)
                 price = st.number_input("Price ($)", min_value=0.01, value=499.99, step=0.01)
             
             with col2:
@@ -760,20 +1055,23 @@ def show_admin_dashboard():
             submitted = st.form_submit_button("Add Guitar", type="primary", use_container_width=True)
             
             if submitted:
+                payload = {
+                    "name": name,
+                    "brand": brand,
+                    "guitar_type": guitar_type,
+                    "price": price,
+                    "stock": stock,
+                    "description": description,
+                    "image_url": image_url or placeholder_url(brand, guitar_type, "guitar", height=300)
+                }
+                
                 if not name or not brand:
                     st.error("Name and Brand are required!")
                 else:
-                    result = api_request("POST", "/admin/guitars", {
-                        "name": name,
-                        "brand": brand,
-                        "guitar_type": guitar_type,
-                        "price": price,
-                        "stock": stock,
-                        "description": description,
-                        "image_url": image_url or f"https://placeholder.svg?height=300&width=300&query={brand}+{guitar_type}+guitar"
-                    }, auth=True)
+                    result = api_request("POST", "/admin/guitars", payload, auth=True)
                     
                     if result:
+                        clear_api_cache()
                         st.success(f"Successfully added {brand} {name} to inventory!")
                         st.json(result.get("guitar", {}))
 
@@ -809,8 +1107,8 @@ def show_navigation():
                 st.markdown("---")
                 st.markdown("### Admin")
                 
-                notifications = api_request("GET", "/admin/notifications", {"unread_only": True}, auth=True)
-                notif_count = notifications.get("count", 0) if notifications else 0
+                unread = api_request("GET", "/admin/notifications/unread-count", auth=True, cached=True)
+                notif_count = unread.get("count", 0) if unread else 0
                 
                 if notif_count > 0:
                     if st.button(f"Admin Dashboard ({notif_count} new)", use_container_width=True, type="primary"):
@@ -828,6 +1126,9 @@ def show_navigation():
 
 
 def main():
+    reset_run_requests()
+    st.markdown(PAGE_CSS, unsafe_allow_html=True)
+    
     if not st.session_state.token:
         show_login_page()
         return
@@ -1,33 +1,201 @@
 import sqlite3
+import string
+import threading
+import orjson
+from collections import OrderedDict
 from contextlib import contextmanager
+from functools import lru_cache
 from typing import Optional, List, Tuple
 from datetime import datetime
 
 from models import Guitar, GuitarType, User, UserRole, OrderStatus, Category
 
+SQLITE_PRAGMAS = (
+    "PRAGMA busy_timeout=30000",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
+)
+
+CACHED_STATEMENTS = 256
+
+# Column order _row_to_guitar unpacks.
+GUITAR_COLUMNS = 'id, name, brand, guitar_type, price, stock, description, image_url, category_id, discount_percent, created_at AS "created_at [timestamp]"'
+# Column order _row_to_user unpacks.
+USER_COLUMNS = 'id, username, email, password_hash, role, is_online, last_login, created_at AS "created_at [timestamp]"'
+
+INSERT_GUITAR_SQL = """
+    INSERT INTO guitars (name, brand, guitar_type, price, stock, description, image_url, category_id, discount_percent)
+    SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?
+"""
+# Takes name and brand after the INSERT_GUITAR_SQL parameters.
+INSERT_GUITAR_IF_NEW = "WHERE NOT EXISTS (SELECT 1 FROM guitars WHERE name = ? COLLATE NOCASE AND brand = ? COLLATE NOCASE)"
+
+UPDATABLE_COLUMNS = {
+    "categories": frozenset({'name', 'description'}),
+    "guitars": frozenset({'name', 'brand', 'guitar_type', 'price', 'stock', 'description', 'image_url', 'category_id', 'discount_percent'}),
+    "users": frozenset({'email', 'password_hash', 'role', 'is_online', 'last_login'}),
+}
+
+@lru_cache(maxsize=256)
+def _update_sql(table: str, columns: Tuple[str, ...]) -> str:
+    # Callers pass sorted columns.
+    set_clause = ", ".join(f"{column} = ?" for column in columns)
+    return f"UPDATE {table} SET {set_clause} WHERE id = ?"
+
+
+GUITAR_TYPES = GuitarType._value2member_map_
+USER_ROLES = UserRole._value2member_map_
+
+
+@lru_cache(maxsize=4096)
+def _parse_timestamp(value: bytes) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value.decode())
+    except ValueError:
+        return None
+
+
+def _convert_timestamp(value: bytes) -> datetime:
+    return _parse_timestamp(value) or datetime.now()
+
+
+sqlite3.register_converter("timestamp", _convert_timestamp)
+
+
+def _dict_rows(cursor: sqlite3.Cursor) -> List[dict]:
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor]
+
+
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def _nocase(value: str) -> str:
+    # SQLite's NOCASE folds ASCII letters only.
+    return value.translate(_ASCII_LOWER)
+
+
+class InsufficientStockError(ValueError):
+    def __init__(self, guitar_id: int):
+        super().__init__(f"Insufficient stock for guitar {guitar_id}")
+        self.guitar_id = guitar_id
+
+
+# Bump whenever _init_database gains a table, column, index or view.
+SCHEMA_VERSION = 2
+
+ADDED_COLUMNS = [
+    ("guitars", "discount_percent", "REAL DEFAULT 0"),
+    ("users", "is_online", "INTEGER DEFAULT 0"),
+    ("users", "last_login", "TIMESTAMP"),
+]
+
 
 class DatabaseManager:
+    # Class-level so main.py and every router's instance share versions, caches and connections.
+    inventory_version = 0
+    category_version = 0
+    _categories_by_db: dict = {}
+    order_version = 0
+    _guitar_count_by_db: dict = {}
+    _stats_by_db: dict = {}
+    user_version = 0
+    MEMO_SIZE = 512
+    _guitars_by_id: dict = {"version": None, "entries": OrderedDict()}
+    _users_by_id: dict = {"version": None, "entries": OrderedDict()}
+    _memo_lock = threading.Lock()
+    _local = threading.local()
+    
     def __init__(self, db_path: str = "guitar_shop.db"):
         self.db_path = db_path
         self._init_database()
     
+    def _connect(self) -> sqlite3.Connection:
+        connections = self._local.__dict__.setdefault("connections", {})
+        conn = connections.get(self.db_path)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.db_path,
+                isolation_level=None,
+                check_same_thread=False,
+                detect_types=sqlite3.PARSE_COLNAMES,
+                cached_statements=CACHED_STATEMENTS
+            )
+            conn.row_factory = sqlite3.Row
+            for pragma in SQLITE_PRAGMAS:
+                conn.execute(pragma)
+            connections[self.db_path] = conn
+        return conn
+    
     @contextmanager
-    def get_connection(self):
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+    def get_connection(self, immediate: bool = False):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
         try:
             yield conn
-            conn.commit()
+            conn.execute("COMMIT")
         except Exception as e:
-            conn.rollback()
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
             raise e
-        finally:
-            conn.close()
+    
+    @classmethod
+    def _bump_inventory_version(cls) -> None:
+        cls.inventory_version += 1
+    
+    @classmethod
+    def _bump_order_version(cls) -> None:
+        cls.order_version += 1
+    
+    @classmethod
+    def _bump_user_version(cls) -> None:
+        cls.user_version += 1
+    
+    @classmethod
+    def _invalidate_categories(cls) -> None:
+        cls.category_version += 1
+        cls._categories_by_db.clear()
+    
+    def _memoized(self, memo: dict, version_attr: str, item_id: int, load):
+        version = getattr(DatabaseManager, version_attr)
+        key = (self.db_path, item_id)
+        with self._memo_lock:
+            if memo["version"] != version:
+                memo["version"] = version
+                memo["entries"] = OrderedDict()
+            value = memo["entries"].get(key)
+            if value is not None:
+                memo["entries"].move_to_end(key)
+                return value
+        
+        value = load()
+        with self._memo_lock:
+            if value is not None and memo["version"] == version == getattr(DatabaseManager, version_attr):
+                entries = memo["entries"]
+                entries[key] = value
+                if len(entries) > self.MEMO_SIZE:
+                    entries.popitem(last=False)
+        return value
+    
+    def optimize(self) -> None:
+        conn = self._connect()
+        conn.execute("PRAGMA analysis_limit=400")
+        conn.execute("PRAGMA optimize")
     
     def _init_database(self) -> None:
-        with self.get_connection() as conn:
+        # journal_mode can't change inside a transaction, and :memory: has no journal.
+        if self.db_path != ":memory:":
+            self._connect().execute("PRAGMA journal_mode=WAL")
+        
+        with self.get_connection(immediate=True) as conn:
             cursor = conn.cursor()
             
+            cursor.execute("PRAGMA user_version")
+            if cursor.fetchone()[0] >= SCHEMA_VERSION:
+                return
+            
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS categories (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -103,6 +271,41 @@ class DatabaseManager:
                 )
             """)
             
+            for table, column, definition in ADDED_COLUMNS:
+                existing = {row['name'] for row in cursor.execute(f"PRAGMA table_info({table})")}
+                if column not in existing:
+                    cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            
+            indexes = [
+                "CREATE INDEX IF NOT EXISTS idx_guitars_category ON guitars (category_id)",
+                "CREATE INDEX IF NOT EXISTS idx_guitars_type ON guitars (guitar_type)",
+                "CREATE INDEX IF NOT EXISTS idx_guitars_brand ON guitars (brand)",
+                "CREATE INDEX IF NOT EXISTS idx_guitars_brand_nocase ON guitars (brand COLLATE NOCASE)",
+                "CREATE INDEX IF NOT EXISTS idx_guitars_price ON guitars (price)",
+                "CREATE INDEX IF NOT EXISTS idx_guitars_stock ON guitars (stock)",
+                "DROP INDEX IF EXISTS idx_guitars_name_brand_lower",
+                "CREATE INDEX IF NOT EXISTS idx_guitars_name_brand ON guitars (name COLLATE NOCASE, brand COLLATE NOCASE)",
+                "CREATE INDEX IF NOT EXISTS idx_categories_name ON categories (name COLLATE NOCASE)",
+                "CREATE INDEX IF NOT EXISTS idx_order_items_order ON order_items (order_id)",
+                "CREATE INDEX IF NOT EXISTS idx_order_items_guitar ON order_items (guitar_id)",
+                "CREATE INDEX IF NOT EXISTS idx_orders_user_created ON orders (user_id, created_at DESC)",
+                "CREATE INDEX IF NOT EXISTS idx_guitars_created ON guitars (created_at DESC, id DESC)",
+                "CREATE INDEX IF NOT EXISTS idx_orders_created ON orders (created_at DESC, id DESC)",
+                "CREATE INDEX IF NOT EXISTS idx_notifications_created ON purchase_notifications (created_at DESC, id DESC)",
+                "CREATE INDEX IF NOT EXISTS idx_guitars_discounted ON guitars (discount_percent DESC) WHERE discount_percent > 0",
+                "CREATE INDEX IF NOT EXISTS idx_notifications_unread ON purchase_notifications (created_at DESC) WHERE is_read = 0",
+                "CREATE INDEX IF NOT EXISTS idx_users_online ON users (last_login DESC) WHERE is_online = 1 AND role != 'admin'"
+            ]
+            
+            for index_sql in indexes:
+                cursor.execute(index_sql)
+            
+            # Same cut-off as the catalog's "Low Stock" badge.
+            cursor.execute("""
+                CREATE VIEW IF NOT EXISTS v_low_stock AS
+                SELECT * FROM guitars WHERE stock <= 10
+            """)
+            
             default_categories = [
                 ("Electric", "Electric guitars with pickups and amplification"),
                 ("Acoustic", "Steel-string acoustic guitars"),
@@ -110,154 +313,266 @@ class DatabaseManager:
                 ("Classical", "Nylon-string classical and flamenco guitars")
             ]
             
-            for name, desc in default_categories:
-                cursor.execute("""
-                    INSERT OR IGNORE INTO categories (name, description) VALUES (?, ?)
-                """, (name, desc))
+            cursor.executemany("""
+                INSERT OR IGNORE INTO categories (name, description) VALUES (?, ?)
+            """, default_categories)
+            
+            cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
     
-    def create_category(self, category: Category) -> int:
+    def create_category(self, category: Category) -> Optional[int]:
+        # None when the name is already taken.
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 INSERT INTO categories (name, description) VALUES (?, ?)
+                ON CONFLICT DO NOTHING
+                RETURNING id
             """, (category.name, category.description))
-            return cursor.lastrowid
-    
-    def get_category(self, category_id: int) -> Optional[Category]:
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM categories WHERE id = ?", (category_id,))
             row = cursor.fetchone()
-            if row:
-                return Category(id=row['id'], name=row['name'], description=row['description'])
+        
+        if row is None:
             return None
+        
+        self._invalidate_categories()
+        return row['id']
     
-    def get_category_by_name(self, name: str) -> Optional[Category]:
+    def _categories(self) -> dict:
+        cached = self._categories_by_db.get(self.db_path)
+        if cached is not None:
+            return cached
+        
+        version = self.category_version
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM categories WHERE LOWER(name) = LOWER(?)", (name,))
-            row = cursor.fetchone()
-            if row:
-                return Category(id=row['id'], name=row['name'], description=row['description'])
-            return None
+            cursor.execute("SELECT id, name, description FROM categories ORDER BY name")
+            ordered = [Category(id=row['id'], name=row['name'], description=row['description'])
+                       for row in cursor]
+        
+        cached = {
+            "all": ordered,
+            "by_id": {c.id: c for c in ordered},
+            "by_name": {_nocase(c.name): c for c in ordered}
+        }
+        if version == DatabaseManager.category_version:
+            self._categories_by_db[self.db_path] = cached
+        return cached
+    
+    def get_category(self, category_id: int) -> Optional[Category]:
+        return self._categories()["by_id"].get(category_id)
+    
+    def get_category_by_name(self, name: str) -> Optional[Category]:
+        return self._categories()["by_name"].get(_nocase(name))
     
     def get_all_categories(self) -> List[Category]:
+        return list(self._categories()["all"])
+    
+    def get_categories_with_counts(self) -> List[dict]:
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM categories ORDER BY name")
-            return [Category(id=row['id'], name=row['name'], description=row['description']) 
-                    for row in cursor.fetchall()]
+            cursor.execute("""
+                SELECT c.id, c.name, c.description, COUNT(g.id) as guitar_count
+                FROM categories c
+                LEFT JOIN guitars g ON g.category_id = c.id
+                GROUP BY c.id
+                ORDER BY c.name
+            """)
+            return _dict_rows(cursor)
     
     def update_category(self, category_id: int, **kwargs) -> bool:
         if not kwargs:
             return False
         
-        valid_fields = {'name', 'description'}
+        valid_fields = UPDATABLE_COLUMNS["categories"]
         updates = {k: v for k, v in kwargs.items() if k in valid_fields}
         
         if not updates:
             return False
         
-        set_clause = ", ".join(f"{k} = ?" for k in updates)
-        values = list(updates.values()) + [category_id]
+        columns = tuple(sorted(updates))
+        values = [updates[column] for column in columns] + [category_id]
         
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(f"UPDATE categories SET {set_clause} WHERE id = ?", values)
-            return cursor.rowcount > 0
+            cursor.execute(_update_sql("categories", columns), values)
+            updated = cursor.rowcount > 0
+        
+        self._invalidate_categories()
+        return updated
     
     def delete_category(self, category_id: int) -> bool:
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM categories WHERE id = ?", (category_id,))
-            return cursor.rowcount > 0
+            deleted = cursor.rowcount > 0
+        
+        self._invalidate_categories()
+        return deleted
     
     def get_guitars_by_category(self, category_id: int) -> List[Guitar]:
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM guitars WHERE category_id = ?", (category_id,))
-            return [self._row_to_guitar(row) for row in cursor.fetchall()]
+            cursor.execute(f"SELECT {GUITAR_COLUMNS} FROM guitars WHERE category_id = ?", (category_id,))
+            return [self._row_to_guitar(row) for row in cursor]
     
     def create_guitar(self, guitar: Guitar) -> int:
+        return self._insert_guitar(guitar, only_if_new=False)
+    
+    def create_guitar_if_new(self, guitar: Guitar) -> Optional[int]:
+        # None when a guitar with the same name and brand (any case) exists.
+        return self._insert_guitar(guitar, only_if_new=True)
+    
+    def create_guitars_bulk(self, guitars: List[Guitar]) -> int:
+        # Returns how many were inserted.
+        rows = [self._guitar_params(guitar) + [guitar.name, guitar.brand] for guitar in guitars]
+        
+        with self.get_connection() as conn:
+            before = conn.total_changes
+            conn.executemany(INSERT_GUITAR_SQL + INSERT_GUITAR_IF_NEW, rows)
+            added = conn.total_changes - before
+        
+        if added:
+            self._bump_inventory_version()
+        return added
+    
+    def _guitar_params(self, guitar: Guitar) -> list:
         category_id = guitar.category_id
         if not category_id:
             category = self.get_category_by_name(guitar.guitar_type.value.capitalize())
             category_id = category.id if category else None
         
+        return [
+            guitar.name, 
+            guitar.brand, 
+            guitar.guitar_type.value, 
+            guitar.price, 
+            guitar.stock, 
+            guitar.description, 
+            guitar.image_url,
+            category_id,
+            getattr(guitar, 'discount_percent', 0)
+        ]
+    
+    def _insert_guitar(self, guitar: Guitar, only_if_new: bool) -> Optional[int]:
+        params = self._guitar_params(guitar)
+        query = INSERT_GUITAR_SQL
+        if only_if_new:
+            query += INSERT_GUITAR_IF_NEW
+            params += [guitar.name, guitar.brand]
+        
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO guitars (name, brand, guitar_type, price, stock, description, image_url, category_id, discount_percent)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                guitar.name, 
-                guitar.brand, 
-                guitar.guitar_type.value, 
-                guitar.price, 
-                guitar.stock, 
-                guitar.description, 
-                guitar.image_url,
-                category_id,
-                getattr(guitar, 'discount_percent', 0)
-            ))
-            return cursor.lastrowid
+            cursor.execute(query + " RETURNING id", params)
+            row = cursor.fetchone()
+        
+        if row is None:
+            return None
+        
+        self._bump_inventory_version()
+        return row['id']
     
     def get_guitar(self, guitar_id: int) -> Optional[Guitar]:
+        return self._memoized(self._guitars_by_id, "inventory_version", guitar_id, lambda: self._load_guitar(guitar_id))
+    
+    def _load_guitar(self, guitar_id: int) -> Optional[Guitar]:
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM guitars WHERE id = ?", (guitar_id,))
+            cursor.execute(f"SELECT {GUITAR_COLUMNS} FROM guitars WHERE id = ?", (guitar_id,))
             row = cursor.fetchone()
             if row:
                 return self._row_to_guitar(row)
             return None
     
-    def get_all_guitars(
-        self, 
-        guitar_type: Optional[GuitarType] = None, 
+    def get_guitars_by_ids(self, guitar_ids: List[int]) -> dict:
+        if not guitar_ids:
+            return {}
+        
+        placeholders = ", ".join("?" for _ in guitar_ids)
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT {GUITAR_COLUMNS} FROM guitars WHERE id IN ({placeholders})", list(guitar_ids))
+            return {row['id']: self._row_to_guitar(row) for row in cursor}
+    
+    def _guitar_filters(
+        self,
+        guitar_type: Optional[GuitarType] = None,
         brand: Optional[str] = None,
         min_price: Optional[float] = None,
         max_price: Optional[float] = None,
         in_stock_only: bool = False,
         category_id: Optional[int] = None
-    ) -> List[Guitar]:
-        query = "SELECT * FROM guitars WHERE 1=1"
+    ) -> Tuple[str, list]:
+        clause = "WHERE 1=1"
         params = []
         
         if guitar_type:
-            query += " AND guitar_type = ?"
+            clause += " AND guitar_type = ?"
             params.append(guitar_type.value)
         
         if brand:
-            query += " AND brand LIKE ?"
+            clause += " AND brand LIKE ?"
             params.append(f"%{brand}%")
         
         if min_price is not None:
-            query += " AND price >= ?"
+            clause += " AND price >= ?"
             params.append(min_price)
         
         if max_price is not None:
-            query += " AND price <= ?"
+            clause += " AND price <= ?"
             params.append(max_price)
         
         if in_stock_only:
-            query += " AND stock > 0"
+            clause += " AND stock > 0"
         
         if category_id is not None:
-            query += " AND category_id = ?"
+            clause += " AND category_id = ?"
             params.append(category_id)
         
-        query += " ORDER BY created_at DESC"
+        return clause, params
+    
+    def get_all_guitars(
+        self, 
+        guitar_type: Optional[GuitarType] = None, 
+        brand: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        in_stock_only: bool = False,
+        category_id: Optional[int] = None,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> List[Guitar]:
+        where, params = self._guitar_filters(guitar_type, brand, min_price, max_price, in_stock_only, category_id)
+        query = f"SELECT {GUITAR_COLUMNS} FROM guitars {where} ORDER BY created_at DESC, id DESC"
+        
+        if limit is not None:
+            query += " LIMIT ? OFFSET ?"
+            params += [limit, offset]
         
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(query, params)
-            return [self._row_to_guitar(row) for row in cursor.fetchall()]
+            return [self._row_to_guitar(row) for row in cursor]
+    
+    def count_guitars(
+        self,
+        guitar_type: Optional[GuitarType] = None,
+        brand: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        in_stock_only: bool = False,
+        category_id: Optional[int] = None
+    ) -> int:
+        where, params = self._guitar_filters(guitar_type, brand, min_price, max_price, in_stock_only, category_id)
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT COUNT(*) FROM guitars {where}", params)
+            return cursor.fetchone()[0]
     
     def update_guitar(self, guitar_id: int, **kwargs) -> bool:
         if not kwargs:
             return False
         
-        valid_fields = {'name', 'brand', 'guitar_type', 'price', 'stock', 'description', 'image_url', 'category_id', 'discount_percent'}
+        valid_fields = UPDATABLE_COLUMNS["guitars"]
         updates = {k: v for k, v in kwargs.items() if k in valid_fields}
         
         if not updates:
@@ -266,43 +581,50 @@ class DatabaseManager:
         if 'guitar_type' in updates and isinstance(updates['guitar_type'], GuitarType):
             updates['guitar_type'] = updates['guitar_type'].value
         
-        set_clause = ", ".join(f"{k} = ?" for k in updates)
-        values = list(updates.values()) + [guitar_id]
+        columns = tuple(sorted(updates))
+        values = [updates[column] for column in columns] + [guitar_id]
         
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(f"UPDATE guitars SET {set_clause} WHERE id = ?", values)
-            return cursor.rowcount > 0
+            cursor.execute(_update_sql("guitars", columns), values)
+            updated = cursor.rowcount > 0
+        
+        if updated:
+            self._bump_inventory_version()
+        return updated
     
     def delete_guitar(self, guitar_id: int) -> bool:
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM guitars WHERE id = ?", (guitar_id,))
-            return cursor.rowcount > 0
-    
-    def update_stock(self, guitar_id: int, quantity_change: int) -> bool:
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                UPDATE guitars SET stock = stock + ? 
-                WHERE id = ? AND stock + ? >= 0
-            """, (quantity_change, guitar_id, quantity_change))
-            return cursor.rowcount > 0
+            deleted = cursor.rowcount > 0
+        
+        if deleted:
+            self._bump_inventory_version()
+        return deleted
     
     def guitar_exists(self, name: str, brand: str) -> bool:
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
-                "SELECT id FROM guitars WHERE LOWER(name) = LOWER(?) AND LOWER(brand) = LOWER(?)",
+                "SELECT id FROM guitars WHERE name = ? COLLATE NOCASE AND brand = ? COLLATE NOCASE",
                 (name, brand)
             )
             return cursor.fetchone() is not None
     
     def get_guitar_count(self) -> int:
+        version = DatabaseManager.inventory_version
+        cached = self._guitar_count_by_db.get(self.db_path)
+        if cached and cached[0] == version:
+            return cached[1]
+        
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT COUNT(*) FROM guitars")
-            return cursor.fetchone()[0]
+            count = cursor.fetchone()[0]
+        
+        self._guitar_count_by_db[self.db_path] = (version, count)
+        return count
     
     def apply_discount_to_guitar(self, guitar_id: int, discount_percent: float) -> bool:
         if not 0 <= discount_percent <= 100:
@@ -316,9 +638,13 @@ class DatabaseManager:
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                UPDATE guitars SET discount_percent = ? WHERE LOWER(brand) = LOWER(?)
+                UPDATE guitars SET discount_percent = ? WHERE brand = ? COLLATE NOCASE
             """, (discount_percent, brand))
-            return cursor.rowcount
+            count = cursor.rowcount
+        
+        if count:
+            self._bump_inventory_version()
+        return count
     
     def apply_discount_to_type(self, guitar_type: str, discount_percent: float) -> int:
         if not 0 <= discount_percent <= 100:
@@ -326,52 +652,73 @@ class DatabaseManager:
         
         with self.get_connection() as conn:
             cursor = conn.cursor()
+            # guitar_type is stored as the lowercase GuitarType value.
             cursor.execute("""
-                UPDATE guitars SET discount_percent = ? WHERE LOWER(guitar_type) = LOWER(?)
-            """, (discount_percent, guitar_type))
-            return cursor.rowcount
+                UPDATE guitars SET discount_percent = ? WHERE guitar_type = ?
+            """, (discount_percent, guitar_type.lower()))
+            count = cursor.rowcount
+        
+        if count:
+            self._bump_inventory_version()
+        return count
     
     def clear_all_discounts(self) -> int:
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("UPDATE guitars SET discount_percent = 0 WHERE discount_percent > 0")
-            return cursor.rowcount
+            count = cursor.rowcount
+        
+        if count:
+            self._bump_inventory_version()
+        return count
     
     def get_discounted_guitars(self) -> List[Guitar]:
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM guitars WHERE discount_percent > 0 ORDER BY discount_percent DESC")
-            return [self._row_to_guitar(row) for row in cursor.fetchall()]
+            cursor.execute(f"SELECT {GUITAR_COLUMNS} FROM guitars WHERE discount_percent > 0 ORDER BY discount_percent DESC")
+            return [self._row_to_guitar(row) for row in cursor]
+    
+    def get_low_stock(self) -> List[Guitar]:
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT {GUITAR_COLUMNS} FROM v_low_stock ORDER BY stock, brand, name")
+            return [self._row_to_guitar(row) for row in cursor]
     
     def create_user(self, user: User) -> int:
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            try:
-                cursor.execute("""
-                    INSERT INTO users (username, email, password_hash, role)
-                    VALUES (?, ?, ?, ?)
-                """, (user.username, user.email, user.password_hash, user.role.value))
-                return cursor.lastrowid
-            except sqlite3.IntegrityError as e:
-                if "username" in str(e):
+            cursor.execute("""
+                INSERT INTO users (username, email, password_hash, role)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT DO NOTHING
+                RETURNING id
+            """, (user.username, user.email, user.password_hash, user.role.value))
+            row = cursor.fetchone()
+            if not row:
+                cursor.execute("SELECT EXISTS(SELECT 1 FROM users WHERE username = ?)", (user.username,))
+                if cursor.fetchone()[0]:
                     raise ValueError("Username already exists")
-                elif "email" in str(e):
-                    raise ValueError("Email already exists")
-                raise
-    
+                raise ValueError("Email already registered")
+        
+        self._bump_user_version()
+        return row['id']
+
     def get_user_by_username(self, username: str) -> Optional[User]:
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
+            cursor.execute(f"SELECT {USER_COLUMNS} FROM users WHERE username = ?", (username,))
             row = cursor.fetchone()
             if row:
                 return self._row_to_user(row)
             return None
     
     def get_user_by_id(self, user_id: int) -> Optional[User]:
+        return self._memoized(self._users_by_id, "user_version", user_id, lambda: self._load_user(user_id))
+    
+    def _load_user(self, user_id: int) -> Optional[User]:
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
+            cursor.execute(f"SELECT {USER_COLUMNS} FROM users WHERE id = ?", (user_id,))
             row = cursor.fetchone()
             if row:
                 return self._row_to_user(row)
@@ -380,7 +727,7 @@ class DatabaseManager:
     def get_user_by_email(self, email: str) -> Optional[User]:
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM users WHERE email = ?", (email,))
+            cursor.execute(f"SELECT {USER_COLUMNS} FROM users WHERE email = ?", (email,))
             row = cursor.fetchone()
             if row:
                 return self._row_to_user(row)
@@ -389,14 +736,14 @@ class DatabaseManager:
     def get_all_users(self) -> List[User]:
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM users ORDER BY created_at DESC")
-            return [self._row_to_user(row) for row in cursor.fetchall()]
+            cursor.execute(f"SELECT {USER_COLUMNS} FROM users ORDER BY created_at DESC")
+            return [self._row_to_user(row) for row in cursor]
     
     def get_online_users(self) -> List[User]:
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM users WHERE is_online = 1 AND role != 'admin' ORDER BY last_login DESC")
-            return [self._row_to_user(row) for row in cursor.fetchall()]
+            cursor.execute(f"SELECT {USER_COLUMNS} FROM users WHERE is_online = 1 AND role != 'admin' ORDER BY last_login DESC")
+            return [self._row_to_user(row) for row in cursor]
     
     def set_user_online(self, user_id: int, is_online: bool) -> bool:
         with self.get_connection() as conn:
@@ -409,31 +756,43 @@ class DatabaseManager:
                 cursor.execute("""
                     UPDATE users SET is_online = 0 WHERE id = ?
                 """, (user_id,))
-            return cursor.rowcount > 0
+            updated = cursor.rowcount > 0
+        
+        if updated:
+            self._bump_user_version()
+        return updated
     
     def update_user(self, user_id: int, **kwargs) -> bool:
         if not kwargs:
             return False
         
-        valid_fields = {'email', 'password_hash', 'role', 'is_online', 'last_login'}
+        valid_fields = UPDATABLE_COLUMNS["users"]
         updates = {k: v for k, v in kwargs.items() if k in valid_fields}
         
         if not updates:
             return False
         
-        set_clause = ", ".join(f"{k} = ?" for k in updates)
-        values = list(updates.values()) + [user_id]
+        columns = tuple(sorted(updates))
+        values = [updates[column] for column in columns] + [user_id]
         
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(f"UPDATE users SET {set_clause} WHERE id = ?", values)
-            return cursor.rowcount > 0
+            cursor.execute(_update_sql("users", columns), values)
+            updated = cursor.rowcount > 0
+        
+        if updated:
+            self._bump_user_version()
+        return updated
     
     def delete_user(self, user_id: int) -> bool:
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM users WHERE id = ?", (user_id,))
-            return cursor.rowcount > 0
+            deleted = cursor.rowcount > 0
+        
+        if deleted:
+            self._bump_user_version()
+        return deleted
     
     def create_purchase_notification(self, order_id: int, user_id: int, username: str, total: float) -> int:
         with self.get_connection() as conn:
@@ -454,19 +813,32 @@ class DatabaseManager:
                 WHERE pn.is_read = 0
                 ORDER BY pn.created_at DESC
             """)
-            return [dict(row) for row in cursor.fetchall()]
+            return _dict_rows(cursor)
     
-    def get_all_notifications(self, limit: int = 50) -> List[dict]:
+    def count_unread_notifications(self) -> int:
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
+            cursor.execute("SELECT COUNT(*) FROM purchase_notifications WHERE is_read = 0")
+            return cursor.fetchone()[0]
+    
+    def get_all_notifications(self, limit: int = 50, offset: int = 0, before_id: Optional[int] = None) -> List[dict]:
+        where = ""
+        params = [limit, offset]
+        if before_id is not None:
+            where = "WHERE (pn.created_at, pn.id) < (SELECT created_at, id FROM purchase_notifications WHERE id = ?)"
+            params.insert(0, before_id)
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
                 SELECT pn.*, o.status as order_status
                 FROM purchase_notifications pn
                 JOIN orders o ON pn.order_id = o.id
-                ORDER BY pn.created_at DESC
-                LIMIT ?
-            """, (limit,))
-            return [dict(row) for row in cursor.fetchall()]
+                {where}
+                ORDER BY pn.created_at DESC, pn.id DESC
+                LIMIT ? OFFSET ?
+            """, params)
+            return _dict_rows(cursor)
     
     def mark_notification_read(self, notification_id: int) -> bool:
         with self.get_connection() as conn:
@@ -486,87 +858,100 @@ class DatabaseManager:
         items: List[Tuple[int, int, float]], 
         total: float
     ) -> int:
-        with self.get_connection() as conn:
+        with self.get_connection(immediate=True) as conn:
             cursor = conn.cursor()
+            for guitar_id, quantity, _ in items:
+                cursor.execute("""
+                    UPDATE guitars SET stock = stock - ? WHERE id = ? AND stock >= ?
+                """, (quantity, guitar_id, quantity))
+                if cursor.rowcount == 0:
+                    raise InsufficientStockError(guitar_id)
+            
             cursor.execute("""
                 INSERT INTO orders (user_id, total, status) VALUES (?, ?, ?)
             """, (user_id, total, OrderStatus.PENDING.value))
             order_id = cursor.lastrowid
             
-            for guitar_id, quantity, price in items:
-                cursor.execute("""
-                    INSERT INTO order_items (order_id, guitar_id, quantity, price_at_purchase)
-                    VALUES (?, ?, ?, ?)
-                """, (order_id, guitar_id, quantity, price))
-            
-            return order_id
+            cursor.executemany("""
+                INSERT INTO order_items (order_id, guitar_id, quantity, price_at_purchase)
+                VALUES (?, ?, ?, ?)
+            """, [(order_id, guitar_id, quantity, price) for guitar_id, quantity, price in items])
+        
+        self._bump_inventory_version()
+        self._bump_order_version()
+        return order_id
     
     def get_user_orders(self, user_id: int) -> List[dict]:
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT o.*, oi.guitar_id, oi.quantity, oi.price_at_purchase, g.name as guitar_name, g.brand
+                SELECT o.id, o.total, o.status, o.created_at,
+                       json_group_array(json_object(
+                           'guitar_id', oi.guitar_id,
+                           'guitar_name', g.brand || ' ' || g.name,
+                           'quantity', oi.quantity,
+                           'price', oi.price_at_purchase
+                       )) as items
                 FROM orders o
                 JOIN order_items oi ON o.id = oi.order_id
                 JOIN guitars g ON oi.guitar_id = g.id
                 WHERE o.user_id = ?
-                ORDER BY o.created_at DESC
+                GROUP BY o.id
+                ORDER BY o.created_at DESC, o.id DESC
             """, (user_id,))
             
-            orders = {}
-            for row in cursor.fetchall():
-                order_id = row['id']
-                if order_id not in orders:
-                    orders[order_id] = {
-                        'id': order_id,
-                        'total': row['total'],
-                        'status': row['status'],
-                        'created_at': row['created_at'],
-                        'items': []
-                    }
-                orders[order_id]['items'].append({
-                    'guitar_id': row['guitar_id'],
-                    'guitar_name': f"{row['brand']} {row['guitar_name']}",
-                    'quantity': row['quantity'],
-                    'price': row['price_at_purchase']
-                })
-            
-            return list(orders.values())
+            return [
+                {
+                    'id': row['id'],
+                    'total': row['total'],
+                    'status': row['status'],
+                    'created_at': row['created_at'],
+                    'items': orjson.loads(row['items'])
+                }
+                for row in cursor
+            ]
     
-    def get_all_orders(self, limit: int = 100) -> List[dict]:
+    def get_all_orders(self, limit: int = 100, offset: int = 0, before_id: Optional[int] = None) -> List[dict]:
+        where = ""
+        params = [limit, offset]
+        if before_id is not None:
+            where = "WHERE (created_at, id) < (SELECT created_at, id FROM orders WHERE id = ?)"
+            params.insert(0, before_id)
+        
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT o.*, u.username, oi.guitar_id, oi.quantity, oi.price_at_purchase, g.name as guitar_name, g.brand
+            # LIMIT applies to orders, not joined item rows.
+            cursor.execute(f"""
+                SELECT o.id, o.user_id, u.username, o.total, o.status, o.created_at,
+                       json_group_array(json_object(
+                           'guitar_id', oi.guitar_id,
+                           'guitar_name', g.brand || ' ' || g.name,
+                           'quantity', oi.quantity,
+                           'price', oi.price_at_purchase
+                       )) as items
                 FROM orders o
                 JOIN users u ON o.user_id = u.id
                 JOIN order_items oi ON o.id = oi.order_id
                 JOIN guitars g ON oi.guitar_id = g.id
-                ORDER BY o.created_at DESC
-                LIMIT ?
-            """, (limit,))
-            
-            orders = {}
-            for row in cursor.fetchall():
-                order_id = row['id']
-                if order_id not in orders:
-                    orders[order_id] = {
-                        'id': order_id,
-                        'user_id': row['user_id'],
-                        'username': row['username'],
-                        'total': row['total'],
-                        'status': row['status'],
-                        'created_at': row['created_at'],
-                        'items': []
-                    }
-                orders[order_id]['items'].append({
-                    'guitar_id': row['guitar_id'],
-                    'guitar_name': f"{row['brand']} {row['guitar_name']}",
-                    'quantity': row['quantity'],
-                    'price': row['price_at_purchase']
-                })
+                WHERE o.id IN (
+                    SELECT id FROM orders {where} ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?
+                )
+                GROUP BY o.id
+                ORDER BY o.created_at DESC, o.id DESC
+            """, params)
             
-            return list(orders.values())
+            return [
+                {
+                    'id': row['id'],
+                    'user_id': row['user_id'],
+                    'username': row['username'],
+                    'total': row['total'],
+                    'status': row['status'],
+                    'created_at': row['created_at'],
+                    'items': orjson.loads(row['items'])
+                }
+                for row in cursor
+            ]
     
     def update_order_status(self, order_id: int, status: OrderStatus) -> bool:
         with self.get_connection() as conn:
@@ -575,7 +960,11 @@ class DatabaseManager:
                 "UPDATE orders SET status = ? WHERE id = ?",
                 (status.value, order_id)
             )
-            return cursor.rowcount > 0
+            updated = cursor.rowcount > 0
+        
+        if updated:
+            self._bump_order_version()
+        return updated
     
     def get_sales_data(self) -> List[dict]:
         with self.get_connection() as conn:
@@ -590,53 +979,52 @@ class DatabaseManager:
                 WHERE o.status != 'cancelled'
                 GROUP BY g.brand, g.guitar_type
             """)
-            return [dict(row) for row in cursor.fetchall()]
+            return _dict_rows(cursor)
     
     def get_inventory_stats(self) -> dict:
+        version = (DatabaseManager.order_version, DatabaseManager.inventory_version)
+        cached = self._stats_by_db.get(self.db_path)
+        if cached and cached[0] == version:
+            return cached[1]
+        
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
             cursor.execute("""
+                WITH brands AS MATERIALIZED (
+                    SELECT brand, SUM(stock) as count, COUNT(*) as model_count
+                    FROM guitars GROUP BY brand
+                ), sales AS MATERIALIZED (
+                    SELECT COUNT(*) as orders, COALESCE(SUM(total), 0) as revenue
+                    FROM orders WHERE status != 'cancelled'
+                )
                 SELECT 
                     COUNT(*) as total_products,
                     SUM(stock) as total_units,
                     SUM(price * stock) as total_value,
-                    AVG(price) as avg_price
+                    AVG(price) as avg_price,
+                    COALESCE(SUM(discount_percent > 0), 0) as discounted_count,
+                    (SELECT json_group_object(guitar_type, count) FROM (
+                        SELECT guitar_type, SUM(stock) as count
+                        FROM guitars GROUP BY guitar_type
+                    )) as by_type,
+                    (SELECT json_group_object(brand, count) FROM (
+                        SELECT brand, count FROM brands ORDER BY count DESC
+                    )) as by_brand,
+                    (SELECT json_group_object(brand, model_count) FROM (
+                        SELECT brand, model_count FROM brands ORDER BY model_count DESC
+                    )) as models_by_brand,
+                    (SELECT orders FROM sales) as total_orders,
+                    (SELECT revenue FROM sales) as total_revenue
                 FROM guitars
             """)
             stats = dict(cursor.fetchone())
             
-            cursor.execute("""
-                SELECT guitar_type, SUM(stock) as count
-                FROM guitars GROUP BY guitar_type
-            """)
-            stats['by_type'] = {row['guitar_type']: row['count'] for row in cursor.fetchall()}
-            
-            cursor.execute("""
-                SELECT brand, SUM(stock) as count
-                FROM guitars GROUP BY brand ORDER BY count DESC
-            """)
-            stats['by_brand'] = {row['brand']: row['count'] for row in cursor.fetchall()}
-            
-            cursor.execute("""
-                SELECT brand, COUNT(*) as model_count
-                FROM guitars GROUP BY brand ORDER BY model_count DESC
-            """)
-            stats['models_by_brand'] = {row['brand']: row['model_count'] for row in cursor.fetchall()}
-            
-            cursor.execute("""
-                SELECT COUNT(*) as total_orders, 
-                       COALESCE(SUM(total), 0) as total_revenue
-                FROM orders WHERE status != 'cancelled'
-            """)
-            sales_stats = dict(cursor.fetchone())
-            stats['total_orders'] = sales_stats['total_orders']
-            stats['total_revenue'] = sales_stats['total_revenue']
-            
-            cursor.execute("SELECT COUNT(*) as discounted FROM guitars WHERE discount_percent > 0")
-            stats['discounted_count'] = cursor.fetchone()['discounted']
-            
-            return stats
+            for key in ('by_type', 'by_brand', 'models_by_brand'):
+                stats[key] = orjson.loads(stats[key])
+        
+        self._stats_by_db[self.db_path] = (version, stats)
+        return stats
     
     def get_brand_statistics(self) -> List[dict]:
         with self.get_connection() as conn:
@@ -654,7 +1042,7 @@ class DatabaseManager:
                 GROUP BY brand
                 ORDER BY model_count DESC
             """)
-            return [dict(row) for row in cursor.fetchall()]
+            return _dict_rows(cursor)
     
     def get_type_statistics(self) -> List[dict]:
         with self.get_connection() as conn:
@@ -672,56 +1060,39 @@ class DatabaseManager:
                 GROUP BY guitar_type
                 ORDER BY model_count DESC
             """)
-            return [dict(row) for row in cursor.fetchall()]
+            return _dict_rows(cursor)
     
     def _row_to_guitar(self, row) -> Guitar:
-        created_at = row['created_at']
-        if isinstance(created_at, str):
-            try:
-                created_at = datetime.fromisoformat(created_at)
-            except:
-                created_at = datetime.now()
+        (guitar_id, name, brand, guitar_type, price, stock,
+         description, image_url, category_id, discount_percent, created_at) = row
         
         guitar = Guitar(
-            id=row['id'],
-            name=row['name'],
-            brand=row['brand'],
-            guitar_type=GuitarType(row['guitar_type']),
-            price=row['price'],
-            stock=row['stock'],
-            description=row['description'] or "",
-            image_url=row['image_url'] or "",
-            category_id=row['category_id'] if 'category_id' in row.keys() else None,
+            id=guitar_id,
+            name=name,
+            brand=brand,
+            guitar_type=GUITAR_TYPES[guitar_type],
+            price=price,
+            stock=stock,
+            description=description or "",
+            image_url=image_url or "",
+            category_id=category_id,
             created_at=created_at
         )
-        if 'discount_percent' in row.keys():
-            guitar.discount_percent = row['discount_percent'] or 0
-        else:
-            guitar.discount_percent = 0
+        guitar.discount_percent = discount_percent or 0
         return guitar
     
     def _row_to_user(self, row) -> User:
-        created_at = row['created_at']
-        if isinstance(created_at, str):
-            try:
-                created_at = datetime.fromisoformat(created_at)
-            except:
-                created_at = datetime.now()
+        (user_id, username, email, password_hash, role,
+         is_online, last_login, created_at) = row
         
         user = User(
-            id=row['id'],
-            username=row['username'],
-            email=row['email'],
-            password_hash=row['password_hash'],
-            role=UserRole(row['role']),
+            id=user_id,
+            username=username,
+            email=email,
+            password_hash=password_hash,
+            role=USER_ROLES[role],
             created_at=created_at
         )
-        if 'is_online' in row.keys():
-            user.is_online = bool(row['is_online'])
-        else:
-            user.is_online = False
-        if 'last_login' in row.keys():
-            user.last_login = row['last_login']
-        else:
-            user.last_login = None
+        user.is_online = bool(is_online)
+        user.last_login = last_login
         return user
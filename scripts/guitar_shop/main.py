@@ -1,11 +1,13 @@
 import sys
 import os
 import random
+import asyncio
 from contextlib import asynccontextmanager
 from typing import Optional, List
+import orjson
 from dotenv import load_dotenv
 
-from fastapi import FastAPI, HTTPException, status, Depends, Query, Body, Header
+from fastapi import FastAPI, HTTPException, status, Depends, Query, Body, Header, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 
@@ -139,20 +141,20 @@ class GuitarScraper: #web scraping
         if existing_count > 0:
             return {"status": "skipped", "message": f"Database already has {existing_count} guitars", "added": 0}
         
-        added_count = 0
-        for item in self.GUITAR_CATALOG:
-            if not db.guitar_exists(item['name'], item['brand']):
-                guitar = Guitar(
-                    name=item['name'],
-                    brand=item['brand'],
-                    guitar_type=GuitarType(item['type']),
-                    price=item['price'],
-                    stock=random.randint(5, 25),
-                    description=item['description'],
-                    image_url=item['image']
-                )
-                db.create_guitar(guitar)
-                added_count += 1
+        stocks = random.choices(range(5, 26), k=len(self.GUITAR_CATALOG))
+        guitars = [
+            Guitar(
+                name=item['name'],
+                brand=item['brand'],
+                guitar_type=GuitarType(item['type']),
+                price=item['price'],
+                stock=stock,
+                description=item['description'],
+                image_url=item['image']
+            )
+            for item, stock in zip(self.GUITAR_CATALOG, stocks)
+        ]
+        added_count = db.create_guitars_bulk(guitars)
         
         return {"status": "success", "message": f"Scraped and added {added_count} guitars to database", "added": added_count}
 
@@ -161,11 +163,31 @@ db = DatabaseManager("guitar_shop.db")
 scraper = GuitarScraper()
 
 
+OPTIMIZE_INTERVAL_SECONDS = 15 * 60
+
+
+async def optimize_periodically():
+    while True:
+        await asyncio.sleep(OPTIMIZE_INTERVAL_SECONDS)
+        await asyncio.to_thread(db.optimize)
+
+
+async def seed_catalog():
+    try:
+        result = await asyncio.to_thread(scraper.populate_database, db)
+    except Exception as e:
+        # Reported now rather than at shutdown; re-raised so /readyz keeps returning 503.
+        print(f"Database initialization failed: {e!r}")
+        raise
+    print(f"Database initialization: {result['message']}")
+    await asyncio.to_thread(db.optimize)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("Starting StringMaster Guitar Shop API...")
-    result = scraper.populate_database(db)
-    print(f"Database initialization: {result['message']}")
+    # Seeding runs alongside the server so the socket opens straight away; /readyz reports when it is done.
+    app.state.seed_task = asyncio.create_task(seed_catalog())
     
     # if not db.get_user_by_username("Admin"):
     #     admin = User(
@@ -177,8 +199,14 @@ async def lifespan(app: FastAPI):
     #     db.create_user(admin)
     #     print("Created admin user (username: Admin, password: Admin123)")
     
+    optimizer = asyncio.create_task(optimize_periodically())
+    
     yield
     print("Shutting down StringMaster Guitar Shop API...")
+    optimizer.cancel()
+    # Wait for a seed still in flight; a failed one was already reported by seed_catalog.
+    await asyncio.gather(app.state.seed_task, return_exceptions=True)
+    db.optimize()
 
 
 app = FastAPI(
@@ -208,18 +236,32 @@ def verify_api_key(x_api_key: Optional[str] = Header(None)):
     return x_api_key
 
 
+# Static, so serialized once rather than on every hit.
+ROOT_BODY = orjson.dumps({
+    "name": "StringMaster Guitar Shop API",
+    "version": "2.0.0",
+    "status": "running",
+    "docs": "/docs",
+    "api_key_required": True
+})
+
+
 @app.get("/")
 def root():
-    return {
-        "name": "StringMaster Guitar Shop API",
-        "version": "2.0.0",
-        "status": "running",
-        "docs": "/docs",
-        "api_key_required": True
-    }
+    return Response(content=ROOT_BODY, media_type="application/json")
+
+
+@app.get("/readyz")
+def readiness_check():
+    seed_task = app.state.seed_task
+    if not seed_task.done():
+        raise HTTPException(status_code=503, detail="Catalog is still being seeded")
+    if seed_task.cancelled() or seed_task.exception():
+        raise HTTPException(status_code=503, detail="Catalog seeding failed")
+    return {"status": "ready"}
 
 
-@app.get("/api/health")
+@app.get("/api/health", response_model=dict)
 def health_check():
     guitar_count = db.get_guitar_count()
     categories = db.get_all_categories()
@@ -231,7 +273,7 @@ def health_check():
     }
 
 
-@app.get("/api/stats")
+@app.get("/api/stats", response_model=dict)
 def get_shop_stats():
     stats = db.get_inventory_stats()
     return {
@@ -247,7 +289,7 @@ def get_shop_stats():
     }
 
 
-@app.get("/api/admin/online-users")
+@app.get("/api/admin/online-users", response_model=dict)
 def get_online_users(admin: dict = Depends(get_admin_user)):
     users = db.get_online_users()
     return {
@@ -264,16 +306,18 @@ def get_online_users(admin: dict = Depends(get_admin_user)):
     }
 
 
-@app.get("/api/admin/notifications")
+@app.get("/api/admin/notifications", response_model=dict)
 def get_notifications(
     unread_only: bool = Query(False),
     limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    before_id: Optional[int] = Query(None, description="Continue after this notification"),
     admin: dict = Depends(get_admin_user)
 ):
     if unread_only:
         notifications = db.get_unread_notifications()
     else:
-        notifications = db.get_all_notifications(limit)
+        notifications = db.get_all_notifications(limit, offset, before_id)
     
     return {
         "count": len(notifications),
@@ -281,6 +325,11 @@ def get_notifications(
     }
 
 
+@app.get("/api/admin/notifications/unread-count", response_model=dict)
+def get_unread_notification_count(admin: dict = Depends(get_admin_user)):
+    return {"count": db.count_unread_notifications()}
+
+
 @app.post("/api/admin/notifications/mark-read")
 def mark_notifications_read(
     notification_id: Optional[int] = Body(None),
@@ -299,19 +348,21 @@ def mark_notifications_read(
         raise HTTPException(status_code=400, detail="Specify notification_id or mark_all=true")
 
 
-@app.get("/api/admin/orders")
+@app.get("/api/admin/orders", response_model=dict)
 def get_all_orders(
     limit: int = Query(100, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    before_id: Optional[int] = Query(None, description="Continue after this order"),
     admin: dict = Depends(get_admin_user)
 ):
-    orders = db.get_all_orders(limit)
+    orders = db.get_all_orders(limit, offset, before_id)
     return {
         "count": len(orders),
         "orders": orders
     }
 
 
-@app.get("/api/admin/brand-statistics")
+@app.get("/api/admin/brand-statistics", response_model=dict)
 def get_brand_statistics(admin: dict = Depends(get_admin_user)):
     stats = db.get_brand_statistics()
     return {
@@ -320,7 +371,7 @@ def get_brand_statistics(admin: dict = Depends(get_admin_user)):
     }
 
 
-@app.get("/api/admin/type-statistics")
+@app.get("/api/admin/type-statistics", response_model=dict)
 def get_type_statistics(admin: dict = Depends(get_admin_user)):
     stats = db.get_type_statistics()
     return {
@@ -365,7 +416,7 @@ def clear_discounts(admin: dict = Depends(get_admin_user)):
     return {"message": f"Cleared discounts from {count} guitars"}
 
 
-@app.get("/api/admin/discounted-guitars")
+@app.get("/api/admin/discounted-guitars", response_model=dict)
 def get_discounted_guitars(admin: dict = Depends(get_admin_user)):
     guitars = db.get_discounted_guitars()
     return {
@@ -381,6 +432,12 @@ def get_discounted_guitars(admin: dict = Depends(get_admin_user)):
     }
 
 
+@app.get("/api/admin/low-stock", response_model=dict)
+def get_low_stock(admin: dict = Depends(get_admin_user)):
+    guitars = db.get_low_stock()
+    return {"count": len(guitars), "guitars": [g.to_dict() for g in guitars]}
+
+
 @app.post("/api/admin/guitars", status_code=status.HTTP_201_CREATED)
 def admin_create_guitar(
     guitar_data: GuitarCreate,
@@ -396,10 +453,9 @@ def admin_create_guitar(
         image_url=guitar_data.image_url
     )
     
-    if db.guitar_exists(guitar.name, guitar.brand):
+    guitar_id = db.create_guitar_if_new(guitar)
+    if guitar_id is None:
         raise HTTPException(status_code=400, detail="Guitar with this name and brand already exists")
-    
-    guitar_id = db.create_guitar(guitar)
     guitar.id = guitar_id
     
     return {
@@ -93,6 +93,11 @@ class CartItemCreate(BaseModel):
     quantity: int = Field(default=1, ge=1)
 
 
+class CartBulkAdd(BaseModel):
+    items: List[CartItemCreate] = Field(..., min_length=1)
+    replace: bool = Field(default=False, description="Replace the cart's contents instead of adding to them")
+
+
 class OrderCreate(BaseModel):
     items: List[CartItemCreate]
 
@@ -283,7 +288,7 @@ __all__ = [
     'GuitarType', 'UserRole', 'OrderStatus',
     'GuitarCreate', 'GuitarUpdate', 'GuitarResponse',
     'UserCreate', 'UserLogin', 'UserResponse',
-    'CartItemCreate', 'OrderCreate', 'TokenResponse',
+    'CartItemCreate', 'CartBulkAdd', 'OrderCreate', 'TokenResponse',
     'CategoryCreate', 'CategoryResponse',
     'Guitar', 'User', 'Category', 'CartItem', 'Order', 'ShoppingCart',
     'ElectricGuitar', 'AcousticGuitar', 'BassGuitar', 'ClassicalGuitar'
@@ -156,12 +156,6 @@ def register_user(user_data: UserCreate):
     if not AuthManager.validate_email(user_data.email):
         raise HTTPException(status_code=400, detail="Invalid email format")
     
-    if db.get_user_by_username(user_data.username):
-        raise HTTPException(status_code=400, detail="Username already exists")
-    
-    if db.get_user_by_email(user_data.email):
-        raise HTTPException(status_code=400, detail="Email already registered")
-    
     user = User(
         username=user_data.username,
         email=user_data.email,
@@ -16,6 +16,11 @@ def list_categories():
     return [cat.to_dict() for cat in categories]
 
 
+@router.get("/counts", response_model=List[dict])
+def list_categories_with_counts():
+    return db.get_categories_with_counts()
+
+
 @router.get("/{category_id}")
 def get_category(category_id: int):
     category = db.get_category(category_id)
@@ -56,6 +61,8 @@ def create_category(
     )
     
     category_id = db.create_category(category)
+    if category_id is None:
+        raise HTTPException(status_code=400, detail="Category with this name already exists")
     category.id = category_id
     
     return {"message": "Category created successfully", "category": category.to_dict()}
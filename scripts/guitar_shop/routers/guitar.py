@@ -1,11 +1,16 @@
+import hashlib
+import threading
+from collections import OrderedDict
 from typing import Optional, List
-from fastapi import APIRouter, HTTPException, Depends, status, Query
+
+import orjson
+from fastapi import APIRouter, HTTPException, Depends, status, Query, Header, Response
 
 from models import (
     Guitar, GuitarType, GuitarCreate, GuitarUpdate,
-    ShoppingCart, CartItemCreate, UserRole
+    ShoppingCart, CartItemCreate, CartBulkAdd, UserRole
 )
-from database import DatabaseManager
+from database import DatabaseManager, InsufficientStockError
 from routers.auth import get_current_user, get_admin_user, get_customer_user
 
 router = APIRouter(prefix="/api/guitars", tags=["Guitars"])
@@ -14,6 +19,21 @@ db = DatabaseManager("guitar_shop.db")
 
 user_carts: dict[int, ShoppingCart] = {}
 
+# Serialized /page bodies for one inventory version, least recently used dropped past the cap.
+PAGE_CACHE_SIZE = 256
+_page_cache: dict = {"version": None, "entries": OrderedDict()}
+_page_cache_lock = threading.Lock()
+
+
+def _guitar_response(guitar: Guitar) -> dict:
+    guitar_dict = guitar.to_dict()
+    discount = getattr(guitar, 'discount_percent', 0)
+    guitar_dict['discount_percent'] = discount
+    if discount > 0:
+        guitar_dict['original_price'] = guitar.price
+        guitar_dict['discounted_price'] = round(guitar.price * (1 - discount / 100), 2)
+    return guitar_dict
+
 
 @router.get("/", response_model=List[dict])
 def list_guitars(
@@ -33,17 +53,66 @@ def list_guitars(
         category_id=category_id
     )
     
-    result = []
-    for g in guitars:
-        guitar_dict = g.to_dict()
-        discount = getattr(g, 'discount_percent', 0)
-        guitar_dict['discount_percent'] = discount
-        if discount > 0:
-            guitar_dict['original_price'] = g.price
-            guitar_dict['discounted_price'] = round(g.price * (1 - discount / 100), 2)
-        result.append(guitar_dict)
+    return [_guitar_response(g) for g in guitars]
+
+
+def _cached_page(key: tuple, build) -> tuple:
+    version = DatabaseManager.inventory_version
+    with _page_cache_lock:
+        if _page_cache["version"] != version:
+            _page_cache["version"] = version
+            _page_cache["entries"] = OrderedDict()
+        entry = _page_cache["entries"].get(key)
+        if entry is not None:
+            _page_cache["entries"].move_to_end(key)
+            return entry
+    
+    body = orjson.dumps(build())
+    entry = (body, f'"{hashlib.md5(body).hexdigest()}"')
+    with _page_cache_lock:
+        # Skipped if a write moved the version on while the page was being built.
+        if _page_cache["version"] == version:
+            entries = _page_cache["entries"]
+            entries[key] = entry
+            if len(entries) > PAGE_CACHE_SIZE:
+                entries.popitem(last=False)
+    return entry
+
+
+@router.get("/page")
+def list_guitars_page(
+    guitar_type: Optional[GuitarType] = Query(None, description="Filter by guitar type"),
+    brand: Optional[str] = Query(None, description="Filter by brand"),
+    min_price: Optional[float] = Query(None, ge=0, description="Minimum price"),
+    max_price: Optional[float] = Query(None, ge=0, description="Maximum price"),
+    in_stock: bool = Query(False, description="Only show in-stock items"),
+    category_id: Optional[int] = Query(None, description="Filter by category ID"),
+    limit: int = Query(12, ge=1, le=100, description="Page size"),
+    offset: int = Query(0, ge=0, description="Number of guitars to skip"),
+    if_none_match: Optional[str] = Header(None)
+):
+    filters = {
+        "guitar_type": guitar_type,
+        "brand": brand,
+        "min_price": min_price,
+        "max_price": max_price,
+        "in_stock_only": in_stock,
+        "category_id": category_id
+    }
     
-    return result
+    def build():
+        guitars = db.get_all_guitars(**filters, limit=limit, offset=offset)
+        return {
+            "items": [_guitar_response(g) for g in guitars],
+            "total": db.count_guitars(**filters),
+            "limit": limit,
+            "offset": offset
+        }
+    
+    body, etag = _cached_page(tuple(filters.values()) + (limit, offset), build)
+    if if_none_match == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
 
 @router.get("/{guitar_id}")
@@ -53,14 +122,7 @@ def get_guitar(guitar_id: int):
     if not guitar:
         raise HTTPException(status_code=404, detail="Guitar not found")
     
-    guitar_dict = guitar.to_dict()
-    discount = getattr(guitar, 'discount_percent', 0)
-    guitar_dict['discount_percent'] = discount
-    if discount > 0:
-        guitar_dict['original_price'] = guitar.price
-        guitar_dict['discounted_price'] = round(guitar.price * (1 - discount / 100), 2)
-    
-    return guitar_dict
+    return _guitar_response(guitar)
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
@@ -171,6 +233,45 @@ def add_to_cart(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.post("/cart/bulk-add")
+def bulk_add_to_cart(
+    bulk: CartBulkAdd,
+    current_user: dict = Depends(get_customer_user)
+):
+    user_id = current_user['user_id']
+    
+    # With replace the lines go into a fresh cart, swapped in only once they all pass.
+    if bulk.replace or user_id not in user_carts:
+        cart = ShoppingCart(user_id)
+    else:
+        cart = user_carts[user_id]
+    
+    found = db.get_guitars_by_ids({item.guitar_id for item in bulk.items})
+    
+    # Check the combined quantities up front so a bad line leaves the cart untouched.
+    requested = {item.guitar_id: 0 for item in bulk.items}
+    for cart_item in cart.get_items():
+        if cart_item.guitar.id in requested:
+            requested[cart_item.guitar.id] += cart_item.quantity
+    for item in bulk.items:
+        guitar = found.get(item.guitar_id)
+        if not guitar:
+            raise HTTPException(status_code=404, detail=f"Guitar {item.guitar_id} not found")
+        requested[item.guitar_id] += item.quantity
+        if requested[item.guitar_id] > guitar.stock:
+            raise HTTPException(status_code=400, detail=f"Only {guitar.stock} of {guitar.name} available")
+    
+    guitars = [(found[item.guitar_id], item.quantity) for item in bulk.items]
+    try:
+        for guitar, quantity in guitars:
+            cart.add_item(guitar, quantity)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    user_carts[user_id] = cart
+    return {"message": f"Added {len(guitars)} items to cart", "item_count": cart.item_count}
+
+
 @router.put("/cart/{guitar_id}")
 def update_cart_item(
     guitar_id: int,
@@ -228,9 +329,10 @@ def purchase_guitars(current_user: dict = Depends(get_customer_user)):
     
     items = []
     order_total = 0
+    current = db.get_guitars_by_ids([cart_item.guitar.id for cart_item in cart.get_items()])
     
     for cart_item in cart.get_items():
-        guitar = db.get_guitar(cart_item.guitar.id)
+        guitar = current.get(cart_item.guitar.id)
         if not guitar or guitar.stock < cart_item.quantity:
             raise HTTPException(
                 status_code=400,
@@ -246,13 +348,17 @@ def purchase_guitars(current_user: dict = Depends(get_customer_user)):
     
     order_total = round(order_total, 2)
     
-    order_id = db.create_order(user_id, items, order_total)
+    # Another checkout may have taken the stock since the check above; create_order re-checks atomically.
+    try:
+        order_id = db.create_order(user_id, items, order_total)
+    except InsufficientStockError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Insufficient stock for {current[e.guitar_id].name}"
+        )
     
     db.create_purchase_notification(order_id, user_id, username, order_total)
     
-    for guitar_id, quantity, _ in items:
-        db.update_stock(guitar_id, -quantity)
-    
     cart.clear()
     
     return {